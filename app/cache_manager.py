@@ -1,15 +1,101 @@
 """Cache manager for storing and retrieving API data locally."""
+import mmap
+import os
 import pickle
 import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from datetime import datetime
 
+import zstandard as zstd
+
+
+CACHE_FORMATS = ("msgpack", "orjson", "pickle")
+
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# Every zstd frame starts with these bytes; used to tell compressed files from
+# legacy uncompressed ones.
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_ZSTD_SUFFIX = ".zst"
+
+# Key suffix of the entry holding an API response's HTTP validators (ETag/Last-Modified).
+_VALIDATORS_SUFFIX = "_validators"
+
+# Serializer suffixes of every supported format, used to map file names back to keys.
+_FORMAT_SUFFIXES = (".msgpack", ".json", ".pickle")
+
+# Cache directories already created by this process (shared by all CacheManager instances).
+_ENSURED_DIRS: set = set()
+
+
+def _get_codec(cache_format: str) -> Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """Return (file suffix, encode, decode) for a cache format.
+
+    Only the serializer for the selected format is imported.
+    """
+    if cache_format == "msgpack":
+        import msgspec
+
+        return ".msgpack", msgspec.msgpack.encode, msgspec.msgpack.decode
+    if cache_format == "orjson":
+        import orjson
+
+        return ".json", orjson.dumps, orjson.loads
+    if cache_format == "pickle":
+        return ".pickle", partial(pickle.dumps, protocol=_PICKLE_PROTOCOL), pickle.loads
+    raise RuntimeError(
+        f"Unsupported cache format: {cache_format!r} (expected one of {', '.join(CACHE_FORMATS)})"
+    )
+
+
+def _key_from_filename(name: str) -> str:
+    """Strip the compression and serializer suffixes from a cache file name."""
+    if name.endswith(_ZSTD_SUFFIX):
+        name = name[:-len(_ZSTD_SUFFIX)]
+    for suffix in _FORMAT_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class _LazyMtime:
+    """File mtime that is only formatted if the log record is actually rendered."""
+
+    __slots__ = ("mtime",)
+
+    def __init__(self, mtime: float):
+        self.mtime = mtime
+
+    def __str__(self) -> str:
+        return datetime.fromtimestamp(self.mtime).strftime('%Y-%m-%d %H:%M:%S')
+
 
 class CacheManager:
-    """Manages local caching of API responses using pickle files."""
+    """Manages local caching of API responses.
+
+    Entries are serialized with the configured ``cache_format`` (msgpack by
+    default) and compressed with zstd. Legacy uncompressed files and
+    ``*.pickle`` cache files are still read so existing caches keep warming
+    after an upgrade.
+
+    The total size of ``cache_dir`` is bounded by ``size_limit``: when a write
+    pushes it over the limit, the least recently written files are removed.
+    """
     
-    def __init__(self, cache_dir: Path, use_cache: bool = False):
+    def __init__(
+        self,
+        cache_dir: Path,
+        use_cache: bool = False,
+        cache_format: str = "msgpack",
+        memory_max_entries: int = 32,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        size_limit: int = 1 << 30,
+    ):
         """
         Initialize cache manager.
         
@@ -17,23 +103,191 @@ class CacheManager:
             cache_dir: Directory to store cache files
             use_cache: If True, try to use cached data; if False, always fetch fresh data
                       Note: Data is ALWAYS cached when fetched, regardless of this flag
+            cache_format: Serializer for cache files: 'msgpack', 'orjson' or 'pickle'
+            memory_max_entries: Max number of decoded entries kept in the in-process LRU
+            memory_max_bytes: Max total (encoded) size of entries kept in the in-process LRU
+            size_limit: Max total size in bytes of the files in cache_dir (0 disables eviction)
         """
         self.cache_dir = Path(cache_dir)
         self.use_cache = use_cache
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+        # In-process LRU of decoded entries: cache_key -> (data, encoded size in bytes).
+        # Entries are shared with callers and must be treated as read-only.
+        self._mem: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        self._mem_bytes = 0
+        self.size_limit = size_limit
+        # Running total of the bytes in cache_dir; computed by a directory scan on the
+        # first write and then kept up to date by set/delete.
+        self._total_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+        self.cache_format = cache_format
+        self._suffix, self._encode, self._decode = _get_codec(cache_format)
+        # zstd contexts are not thread-safe; each thread lazily gets its own pair.
+        self._local = threading.local()
         self.logger = logging.getLogger(__name__)
         
-        # Create cache directory if it doesn't exist
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
         if use_cache:
             self.logger.info(f"🔵 Cache mode: READ from cache when available")
         else:
             self.logger.info(f"🟢 Cache mode: ALWAYS fetch fresh data (but will cache it)")
-        self.logger.info(f"📁 Cache directory: {cache_dir}")
+        self.logger.info(f"📁 Cache directory: {cache_dir} (format: {cache_format})")
     
+    def _ensure_cache_dir(self) -> None:
+        """Create the cache directory on first write (reads of a missing dir are just misses)."""
+        if self.cache_dir in _ENSURED_DIRS:
+            return
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        _ENSURED_DIRS.add(self.cache_dir)
+
     def _get_cache_file(self, cache_key: str) -> Path:
         """Get the path to a cache file."""
-        return self.cache_dir / f"{cache_key}.pickle"
+        return self.cache_dir / f"{cache_key}{self._suffix}{_ZSTD_SUFFIX}"
+
+    def _get_candidate_files(self, cache_key: str) -> List[Tuple[Path, Callable[[Any], Any]]]:
+        """Get cache file paths to try, in order, with the decoder to use for each.
+
+        The current (compressed) file comes first, followed by legacy
+        uncompressed and pickle files.
+        """
+        candidates = [
+            (self._get_cache_file(cache_key), self._decode),
+            (self.cache_dir / f"{cache_key}{self._suffix}", self._decode),
+        ]
+        if self._suffix != ".pickle":
+            candidates.append((self.cache_dir / f"{cache_key}.pickle", pickle.loads))
+        return candidates
+
+    def _compressor(self) -> zstd.ZstdCompressor:
+        cctx = getattr(self._local, "cctx", None)
+        if cctx is None:
+            cctx = self._local.cctx = zstd.ZstdCompressor(level=3)
+        return cctx
+
+    def _decompressor(self) -> zstd.ZstdDecompressor:
+        dctx = getattr(self._local, "dctx", None)
+        if dctx is None:
+            dctx = self._local.dctx = zstd.ZstdDecompressor()
+        return dctx
+
+    def _remember(self, cache_key: str, data: Any, size: int) -> None:
+        """Store a decoded entry in the in-process LRU, evicting the oldest entries."""
+        with self._mem_lock:
+            self._forget_locked(cache_key)
+            if self.memory_max_entries <= 0 or size > self.memory_max_bytes:
+                return
+            self._mem[cache_key] = (data, size)
+            self._mem_bytes += size
+            while len(self._mem) > self.memory_max_entries or self._mem_bytes > self.memory_max_bytes:
+                _, (_, evicted_size) = self._mem.popitem(last=False)
+                self._mem_bytes -= evicted_size
+
+    def _forget(self, cache_key: str) -> None:
+        """Drop an entry from the in-process LRU."""
+        with self._mem_lock:
+            self._forget_locked(cache_key)
+
+    def _forget_locked(self, cache_key: str) -> None:
+        entry = self._mem.pop(cache_key, None)
+        if entry is not None:
+            self._mem_bytes -= entry[1]
+
+    def _file_size(self, path: Path) -> int:
+        try:
+            return os.stat(path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _scan_files(self) -> List[Tuple[float, int, str]]:
+        """Return (mtime, size, name) for every cache file in cache_dir.
+
+        In-flight temporary files of concurrent writers are skipped.
+        """
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp") or not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.name))
+        except FileNotFoundError:
+            return []
+        return files
+
+    def _replace_and_track(self, tmp_file: str, cache_file: Path, size: int) -> None:
+        """Move a written temp file into place and enforce size_limit."""
+        if self.size_limit <= 0:
+            os.replace(tmp_file, cache_file)
+            return
+
+        with self._disk_lock:
+            if self._total_bytes is None:
+                os.replace(tmp_file, cache_file)
+                self._total_bytes = sum(f[1] for f in self._scan_files())
+            else:
+                old_size = self._file_size(cache_file)
+                os.replace(tmp_file, cache_file)
+                self._total_bytes += size - old_size
+
+            if self._total_bytes > self.size_limit:
+                self._evict_locked(keep=cache_file.name)
+
+    def _evict_locked(self, keep: str) -> None:
+        """Remove the oldest cache files until cache_dir fits in size_limit.
+
+        The directory is rescanned here, which also corrects any drift of the
+        running total (files removed by other processes, discarded corrupt files).
+        """
+        files = self._scan_files()
+        total = sum(f[1] for f in files)
+        evicted = 0
+        for _, size, name in sorted(files):
+            if total <= self.size_limit:
+                break
+            if name == keep:
+                continue
+            try:
+                os.unlink(self.cache_dir / name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.error(f"❌ Error evicting cache file {name}: {e}")
+                continue
+            total -= size
+            evicted += 1
+            self._forget(_key_from_filename(name))
+        self._total_bytes = total
+        if evicted:
+            self.logger.info(
+                "🧹 Evicted %s cache file(s); cache size now %s MB", evicted, round(total / (1024 * 1024), 2)
+            )
+
+    def _load(self, cache_file: Path, decode: Callable[[Any], Any]) -> Tuple[Any, int, float]:
+        """Decode a cache file, returning (data, uncompressed payload size, mtime).
+
+        The file is memory-mapped so the decompressor/decoder reads straight
+        from the page cache instead of an intermediate bytes copy. The mtime
+        comes from fstat on the open handle, not a second stat of the path.
+        """
+        with open(cache_file, 'rb') as f:
+            mtime = os.fstat(f.fileno()).st_mtime
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped; let the decoder reject them.
+                return decode(b""), 0, mtime
+            with mm:
+                if mm[:4] == _ZSTD_MAGIC:
+                    payload = self._decompressor().decompress(mm)
+                    return decode(payload), len(payload), mtime
+                with memoryview(mm) as view:
+                    return decode(view), len(mm), mtime
     
     def get(self, cache_key: str) -> Optional[Any]:
         """
@@ -46,45 +300,161 @@ class CacheManager:
             Cached data if available and use_cache is True, None otherwise
         """
         if not self.use_cache:
-            self.logger.debug(f"Cache disabled, skipping read for: {cache_key}")
-            return None
-        
-        cache_file = self._get_cache_file(cache_key)
-        
-        if not cache_file.exists():
-            self.logger.info(f"📭 Cache miss: {cache_key} (file not found)")
+            self.logger.debug("Cache disabled, skipping read for: %s", cache_key)
             return None
+        return self.load(cache_key)
+
+    def load(self, cache_key: str, *, quiet: bool = False) -> Optional[Any]:
+        """
+        Read an entry regardless of the use_cache flag.
+
+        Used to reuse a stored payload after a conditional request came back
+        304 Not Modified; regular lookups should go through get().
+        With quiet=True hits and misses are only logged at debug level.
+        """
+        with self._mem_lock:
+            entry = self._mem.get(cache_key)
+            if entry is not None:
+                self._mem.move_to_end(cache_key)
+        if entry is not None:
+            self.logger.debug("Cache hit (memory): %s", cache_key)
+            return entry[0]
         
-        try:
-            with open(cache_file, 'rb') as f:
-                data = pickle.load(f)
+        # Open directly instead of checking exists() first: one path lookup per candidate.
+        for cache_file, decode in self._get_candidate_files(cache_key):
+            try:
+                data, size, mtime = self._load(cache_file, decode)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                # A torn or otherwise unreadable file is treated as a cache miss and removed,
+                # so the next fetch rewrites it instead of failing again.
+                self.logger.error(f"❌ Error reading cache file {cache_key}, discarding it: {e}")
+                try:
+                    cache_file.unlink()
+                except OSError:
+                    pass
+                return None
             
-            # Get file modification time
-            mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
-            self.logger.info(f"✅ Cache hit: {cache_key} (cached on {mtime.strftime('%Y-%m-%d %H:%M:%S')})")
+            self._remember(cache_key, data, size)
+            self.logger.log(
+                logging.DEBUG if quiet else logging.INFO,
+                "✅ Cache hit: %s (cached on %s)",
+                cache_key,
+                _LazyMtime(mtime),
+            )
             return data
-        except Exception as e:
-            self.logger.error(f"❌ Error reading cache file {cache_key}: {e}")
-            return None
+        
+        self.logger.log(logging.DEBUG if quiet else logging.INFO, "📭 Cache miss: %s (file not found)", cache_key)
+        return None
     
+    def mget(self, cache_keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Retrieve several entries at once; keys that miss are left out of the result.
+
+        The cache directory is listed once and only files that exist are opened,
+        instead of probing every candidate path of every key.
+        """
+        if not self.use_cache:
+            self.logger.debug("Cache disabled, skipping bulk read")
+            return {}
+
+        keys = list(dict.fromkeys(cache_keys))
+        found: Dict[str, Any] = {}
+        pending: List[str] = []
+        with self._mem_lock:
+            for cache_key in keys:
+                entry = self._mem.get(cache_key)
+                if entry is None:
+                    pending.append(cache_key)
+                else:
+                    self._mem.move_to_end(cache_key)
+                    found[cache_key] = entry[0]
+        if not pending:
+            return found
+
+        try:
+            with os.scandir(self.cache_dir) as it:
+                names = {entry.name for entry in it}
+        except FileNotFoundError:
+            names = set()
+        for cache_key in pending:
+            if any(f.name in names for f, _ in self._get_candidate_files(cache_key)):
+                data = self.load(cache_key)
+                if data is not None:
+                    found[cache_key] = data
+        self.logger.debug("Bulk cache read: %s of %s key(s) found", len(found), len(keys))
+        return found
+
+    def touch(self, cache_key: str) -> None:
+        """Mark an entry as freshly written (e.g. after a 304 revalidation)."""
+        try:
+            os.utime(self._get_cache_file(cache_key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.debug("Could not touch cache file %s: %s", cache_key, e)
+
+    def conditional_headers(self, cache_key: str) -> Dict[str, str]:
+        """Return If-None-Match/If-Modified-Since headers for a stored API response."""
+        # Most APIs send no validators, so a missing entry is routine: checked quietly.
+        validators = self.load(f"{cache_key}{_VALIDATORS_SUFFIX}", quiet=True)
+        headers: Dict[str, str] = {}
+        if isinstance(validators, dict):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def store_validators(self, cache_key: str, response_headers: Mapping[str, str]) -> None:
+        """Remember the ETag/Last-Modified of the API response cached under cache_key."""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        validators_key = f"{cache_key}{_VALIDATORS_SUFFIX}"
+        if etag or last_modified:
+            self.set(validators_key, {"etag": etag, "last_modified": last_modified})
+        else:
+            # A stale ETag must not be sent for the new payload.
+            self.delete(validators_key)
+
     def set(self, cache_key: str, data: Any) -> None:
         """
         Store data in cache. This ALWAYS happens regardless of use_cache flag.
         
+        The file is written to a uniquely named temporary file and atomically
+        renamed into place, so a crash mid-write never leaves a truncated cache
+        file behind and concurrent writers (threads or processes) of the same
+        key never interleave: the last rename wins. No fsync is done: the cache
+        can always be rebuilt from the APIs.
+        
         Args:
             cache_key: Unique identifier for the cached data
             data: Data to cache
         """
         cache_file = self._get_cache_file(cache_key)
+        tmp_file: Optional[str] = None
         
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(data, f)
+            self._ensure_cache_dir()
+            encoded = self._encode(data)
+            compressed = self._compressor().compress(encoded)
+            fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{cache_file.name}.", suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            self._replace_and_track(tmp_file, cache_file, len(compressed))
+            tmp_file = None
+            self._remember(cache_key, data, len(encoded))
             
-            size_kb = round(cache_file.stat().st_size / 1024, 2)
-            self.logger.info(f"💾 Cached: {cache_key} ({size_kb} KB)")
+            # The written size is known from the buffer; no stat() needed.
+            self.logger.info("💾 Cached: %s (%s KB)", cache_key, round(len(compressed) / 1024, 2))
         except Exception as e:
             self.logger.error(f"❌ Error writing cache file {cache_key}: {e}")
+            if tmp_file is not None:
+                try:
+                    os.unlink(tmp_file)
+                except OSError:
+                    pass
     
     def delete(self, cache_key: str) -> bool:
         """
@@ -93,29 +463,48 @@ class CacheManager:
         Returns:
             True if a cache file existed and was deleted, False otherwise.
         """
-        cache_file = self._get_cache_file(cache_key)
-        if not cache_file.exists():
-            self.logger.debug(f"Cache delete skipped (file not found): {cache_key}")
-            return False
+        self._forget(cache_key)
+        deleted = False
+        for cache_file, _ in self._get_candidate_files(cache_key):
+            with self._disk_lock:
+                size = self._file_size(cache_file) if self._total_bytes is not None else 0
+                try:
+                    cache_file.unlink()
+                    deleted = True
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    self.logger.error(f"❌ Error deleting cache file {cache_key}: {e}")
+                    continue
+                if self._total_bytes is not None:
+                    self._total_bytes -= size
 
-        try:
-            cache_file.unlink()
+        if deleted:
             self.logger.info(f"🗑️ Cache invalidated: {cache_key}")
-            return True
-        except Exception as e:
-            self.logger.error(f"❌ Error deleting cache file {cache_key}: {e}")
-            return False
+        else:
+            self.logger.debug(f"Cache delete skipped (file not found): {cache_key}")
+        return deleted
 
     def list_cache_files(self) -> list[dict]:
-        """List all cache files with metadata."""
+        """List all cache files with metadata, newest first.
+
+        'mtime' is the raw modification timestamp; format it only where it is displayed.
+        """
         cache_files = []
-        for cache_file in self.cache_dir.glob("*.pickle"):
-            stat = cache_file.stat()
-            cache_files.append({
-                'key': cache_file.stem,
-                'file': cache_file.name,
-                'size_bytes': stat.st_size,
-                'size_kb': round(stat.st_size / 1024, 2),
-                'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            })
-        return sorted(cache_files, key=lambda x: x['modified'], reverse=True)
+        suffix = f"{self._suffix}{_ZSTD_SUFFIX}"
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(suffix) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    cache_files.append({
+                        'key': entry.name[:-len(suffix)],
+                        'file': entry.name,
+                        'size_bytes': stat.st_size,
+                        'size_kb': round(stat.st_size / 1024, 2),
+                        'mtime': stat.st_mtime,
+                    })
+        except FileNotFoundError:
+            return []
+        return sorted(cache_files, key=lambda x: x['mtime'], reverse=True)
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast against an endpoint that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and every
+    call raises CircuitOpenError for reset_timeout seconds. The next call is
+    then let through as a probe (half-open): success closes the circuit,
+    failure re-opens it with the timeout multiplied by backoff_factor
+    (capped at max_reset).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        backoff_factor: float = 2,
+        max_reset: float = 300,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.backoff_factor = backoff_factor
+        self.max_reset = max_reset
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._current_timeout = reset_timeout
+        self._opened_at = 0.0
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._current_timeout:
+                # Let exactly one probe through; others keep failing fast.
+                self._state = HALF_OPEN
+                logger.info("🔌 Circuit %s half-open, probing", self.name)
+                return
+            raise CircuitOpenError(
+                f"Circuit for {self.name} is open after {self._failures} consecutive failures; "
+                "skipping call"
+            )
+
+    def _on_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("✅ Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._current_timeout = self.reset_timeout
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                # A call that started before the circuit opened: the fail-fast
+                # window is not extended and the opening is not logged again.
+                return
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._current_timeout = min(self._current_timeout * self.backoff_factor, self.max_reset)
+            elif self._failures < self.failure_threshold:
+                return
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            logger.warning(
+                "⚠️ Circuit %s opened after %s consecutive failures; failing fast for %ss",
+                self.name,
+                self._failures,
+                self._current_timeout,
+            )
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call fn(*args, **kwargs) through the breaker."""
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
@@ -1,25 +1,21 @@
+import functools
+import mmap
 import os
-import re
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import yaml
+from .cache_manager import CACHE_FORMATS
+from .vlan_vid import extract_vlan_vid
 
+# Captured once at import: the process environment is not expected to change at runtime.
+_APP_CONFIG_FILE = os.environ.get("APP_CONFIG_FILE")
 
-def _env_bool(name: str, default: bool = False) -> bool:
-    raw = os.getenv(name)
-    if raw is None:
-        return default
-    v = raw.strip().lower()
-    if v in {"1", "true", "yes", "y", "on"}:
-        return True
-    if v in {"0", "false", "no", "n", "off"}:
-        return False
-    raise RuntimeError(f"Invalid boolean value for {name}={raw!r} (expected true/false).")
+# Accepted "true" spellings for string config flags (compared lower-cased).
+_TRUE_VALUES = frozenset({"1", "true", "yes", "y", "on"})
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FortiGateDevice:
     name: str
     host: str  # e.g. "fg1.example.com" or "10.0.0.1"
@@ -27,7 +23,7 @@ class FortiGateDevice:
     verify_ssl: bool = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Settings:
     fortigate_devices: List[FortiGateDevice]
     netbox_url: str
@@ -41,6 +37,17 @@ class Settings:
     log_level: str = "INFO"
     test_switch: Optional[str] = None
     max_netbox_updates: int = 1
+    cache_format: str = "msgpack"
+    cache_size_limit_mb: int = 1024
+
+
+def _nonempty_str(v: object) -> Optional[str]:
+    """Return v stripped if it is a non-empty string, else None."""
+    if isinstance(v, str):
+        v = v.strip()
+        if v:
+            return v
+    return None
 
 
 def _parse_vlan_translations(raw: object) -> Dict[str, int]:
@@ -58,9 +65,7 @@ def _parse_vlan_translations(raw: object) -> Dict[str, int]:
                 vid = v
             elif isinstance(v, str) and v.strip():
                 # Allow "31" or "VLAN-31" or "vlan31" in config, but normalize to integer vid
-                m = re.match(r"^(?:vlan[- ]?)?(\d+)$", v.strip(), flags=re.IGNORECASE)
-                if m:
-                    vid = int(m.group(1))
+                vid = extract_vlan_vid(v)
 
             if vid is not None:
                 out[k.strip()] = vid
@@ -71,34 +76,102 @@ def _parse_vlan_translations(raw: object) -> Dict[str, int]:
     )
 
 
-def _load_settings_from_yaml(path: str) -> Settings:
-    """Load settings from a single YAML config file."""
-    p = Path(path)
-    if not p.is_file():
-        raise RuntimeError(f"APP_CONFIG_FILE not found: {path}")
+@functools.lru_cache(maxsize=1)
+def _yaml_loader() -> type:
+    """Return libyaml's CSafeLoader, or the pure-Python SafeLoader if it is unavailable.
 
+    PyYAML is imported lazily so it is only loaded when a YAML config is actually read;
+    the loader lookup (and its ImportError fallback) then happens once per process.
+    """
     try:
-        raw_text = p.read_text(encoding="utf-8")
-    except OSError as exc:
-        raise RuntimeError(f"Failed to read YAML config file: {path}: {exc}") from exc
+        from yaml import CSafeLoader as loader
+    except ImportError:  # PyYAML built without libyaml
+        from yaml import SafeLoader as loader
+    return loader
+
 
+def _parse_yaml_config(p: Path) -> object:
+    """Parse a YAML config file."""
+    import yaml
+
+    # The file is memory-mapped and handed to the loader as a binary stream:
+    # libyaml reads the page cache directly and decodes the UTF-8 itself, so
+    # neither a buffered bytes copy nor an intermediate str is built.
     try:
-        raw = yaml.safe_load(raw_text)
+        with p.open("rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped; an empty document loads as None.
+                return None
+            with mm:
+                return yaml.load(mm, Loader=_yaml_loader())
+    except OSError as exc:
+        raise RuntimeError(f"Failed to read YAML config file: {p}: {exc}") from exc
     except yaml.YAMLError as exc:
-        raise RuntimeError(f"Failed to parse YAML config: {path}: {exc}") from exc
+        raise RuntimeError(f"Failed to parse YAML config: {p}: {exc}") from exc
+
+
+def _parse_json_config(p: Path) -> object:
+    """Parse a JSON config file."""
+    import orjson
+
+    try:
+        raw_bytes = p.read_bytes()
+    except OSError as exc:
+        raise RuntimeError(f"Failed to read JSON config file: {p}: {exc}") from exc
+
+    try:
+        return orjson.loads(raw_bytes)
+    except orjson.JSONDecodeError as exc:
+        raise RuntimeError(f"Failed to parse JSON config: {p}: {exc}") from exc
+
+
+def _parse_toml_config(p: Path) -> object:
+    """Parse a TOML config file."""
+    import tomllib
+
+    try:
+        raw_bytes = p.read_bytes()
+    except OSError as exc:
+        raise RuntimeError(f"Failed to read TOML config file: {p}: {exc}") from exc
+
+    try:
+        return tomllib.loads(raw_bytes.decode("utf-8"))
+    except (UnicodeDecodeError, tomllib.TOMLDecodeError) as exc:
+        raise RuntimeError(f"Failed to parse TOML config: {p}: {exc}") from exc
+
+
+def _load_settings_from_file(path: str) -> Settings:
+    """Load settings from a single config file.
+
+    The format is chosen by suffix: .json and .toml are parsed with orjson and
+    tomllib; anything else (.yml/.yaml) is parsed as YAML. All formats share
+    the same structure (see config.example.yml).
+    """
+    p = Path(path)
+    if not p.is_file():
+        raise RuntimeError(f"APP_CONFIG_FILE not found: {path}")
+
+    suffix = p.suffix.lower()
+    if suffix == ".json":
+        raw = _parse_json_config(p)
+    elif suffix == ".toml":
+        raw = _parse_toml_config(p)
+    else:
+        raw = _parse_yaml_config(p)
 
     if not isinstance(raw, dict):
-        raise RuntimeError("YAML config root must be a mapping/object")
+        raise RuntimeError("Config root must be a mapping/object")
 
     # NetBox config
     netbox = raw.get("netbox") or {}
     if not isinstance(netbox, dict):
         raise RuntimeError("netbox must be a mapping/object")
 
-    netbox_url = netbox.get("url")
-    if not isinstance(netbox_url, str) or not netbox_url.strip():
+    netbox_url = _nonempty_str(netbox.get("url"))
+    if netbox_url is None:
         raise RuntimeError("netbox.url is required")
-    netbox_url = netbox_url.strip()
 
     netbox_timeout = netbox.get("timeout", 120)
     try:
@@ -106,10 +179,9 @@ def _load_settings_from_yaml(path: str) -> Settings:
     except Exception as exc:
         raise RuntimeError("netbox.timeout must be an integer (seconds)") from exc
 
-    nb_token = netbox.get("api_token")
-    if not isinstance(nb_token, str) or not nb_token.strip():
+    nb_token = _nonempty_str(netbox.get("api_token"))
+    if nb_token is None:
         raise RuntimeError("netbox.api_token is required")
-    nb_token = nb_token.strip()
 
     # Runtime config
     runtime = raw.get("runtime") or {}
@@ -117,9 +189,10 @@ def _load_settings_from_yaml(path: str) -> Settings:
         raise RuntimeError("runtime must be a mapping/object")
 
     log_level = str(runtime.get("log_level", "INFO"))
-    test_switch = runtime.get("test_switch")
-    if test_switch is not None and not isinstance(test_switch, str):
+    test_switch_raw = runtime.get("test_switch")
+    if test_switch_raw is not None and not isinstance(test_switch_raw, str):
         raise RuntimeError("runtime.test_switch must be a string or null")
+    test_switch = _nonempty_str(test_switch_raw)
 
     max_netbox_updates_raw = runtime.get("max_netbox_updates", 1)
     try:
@@ -129,23 +202,32 @@ def _load_settings_from_yaml(path: str) -> Settings:
     if max_netbox_updates < 0:
         raise RuntimeError("runtime.max_netbox_updates must be >= 0")
 
+    # Directories are created by their users on first write (CacheManager.set,
+    # configure_logging), not while loading settings.
     sync_data_dir = Path(str(runtime.get("sync_data_dir", "/app/data")))
-    sync_data_dir.mkdir(parents=True, exist_ok=True)
-
     cache_dir = Path(str(runtime.get("cache_dir", "/app/data/cache")))
-    cache_dir.mkdir(parents=True, exist_ok=True)
-
     log_dir = Path(str(runtime.get("log_dir", "/app/data/logs")))
-    log_dir.mkdir(parents=True, exist_ok=True)
 
     use_cached_data_raw = runtime.get("use_cached_data", False)
     if isinstance(use_cached_data_raw, bool):
         use_cached_data = use_cached_data_raw
     elif isinstance(use_cached_data_raw, str):
-        use_cached_data = use_cached_data_raw.strip().lower() in {"1", "true", "yes", "y", "on"}
+        use_cached_data = use_cached_data_raw.strip().lower() in _TRUE_VALUES
     else:
         use_cached_data = False
 
+    cache_format = str(runtime.get("cache_format", "msgpack")).strip().lower()
+    if cache_format not in CACHE_FORMATS:
+        raise RuntimeError(f"runtime.cache_format must be one of: {', '.join(CACHE_FORMATS)}")
+
+    cache_size_limit_raw = runtime.get("cache_size_limit_mb", 1024)
+    try:
+        cache_size_limit_mb = int(cache_size_limit_raw)
+    except Exception as exc:
+        raise RuntimeError("runtime.cache_size_limit_mb must be an integer") from exc
+    if cache_size_limit_mb < 0:
+        raise RuntimeError("runtime.cache_size_limit_mb must be >= 0")
+
     # VLAN translations (now VID-based)
     vlan_translations = _parse_vlan_translations(raw.get("vlan_translations"))
 
@@ -158,15 +240,15 @@ def _load_settings_from_yaml(path: str) -> Settings:
     for d in fg_list:
         if not isinstance(d, dict):
             continue
-        name = d.get("name")
-        host = d.get("host")
-        if not isinstance(name, str) or not name.strip():
+        name = _nonempty_str(d.get("name"))
+        if name is None:
             raise RuntimeError("Each fortigate needs a non-empty name")
-        if not isinstance(host, str) or not host.strip():
+        host = _nonempty_str(d.get("host"))
+        if host is None:
             raise RuntimeError(f"FortiGate {name!r} is missing host")
 
-        api_token = d.get("api_token")
-        if not isinstance(api_token, str) or not api_token.strip():
+        api_token = _nonempty_str(d.get("api_token"))
+        if api_token is None:
             raise RuntimeError(f"FortiGate {name!r} is missing api_token")
 
         verify_ssl = d.get("verify_ssl", True)
@@ -174,7 +256,7 @@ def _load_settings_from_yaml(path: str) -> Settings:
             raise RuntimeError(f"FortiGate {name!r} verify_ssl must be boolean")
 
         fortigate_devices.append(
-            FortiGateDevice(name=name.strip(), host=host.strip(), api_token=api_token.strip(), verify_ssl=verify_ssl)
+            FortiGateDevice(name=name, host=host, api_token=api_token, verify_ssl=verify_ssl)
         )
 
     return Settings(
@@ -188,18 +270,25 @@ def _load_settings_from_yaml(path: str) -> Settings:
         use_cached_data=use_cached_data,
         vlan_translations=vlan_translations,
         log_level=log_level,
-        test_switch=test_switch.strip() if isinstance(test_switch, str) and test_switch.strip() else None,
+        test_switch=test_switch,
         max_netbox_updates=max_netbox_updates,
+        cache_format=cache_format,
+        cache_size_limit_mb=cache_size_limit_mb,
     )
 
 
+@functools.lru_cache(maxsize=1)
 def load_settings() -> Settings:
-    """Load settings from YAML config file or legacy env+JSON mode."""
+    """Load settings from the config file named by APP_CONFIG_FILE (YAML, JSON or TOML).
+
+    The result is memoized for the life of the process; the returned Settings is
+    shared and must not be mutated. Call load_settings.cache_clear() to re-read
+    the config file. APP_CONFIG_FILE itself is read once, when this module is imported.
+    """
 
-    # YAML-first mode (single source of truth)
-    app_config_file = os.getenv("APP_CONFIG_FILE")
-    if app_config_file:
-        return _load_settings_from_yaml(app_config_file)
+    # Single config file mode (single source of truth)
+    if _APP_CONFIG_FILE:
+        return _load_settings_from_file(_APP_CONFIG_FILE)
 
     # Legacy mode not supported - raise clear error
     raise RuntimeError(
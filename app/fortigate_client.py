@@ -1,18 +1,37 @@
-import json
 import logging
-import re
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
+import msgspec
+import orjson
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .cache_manager import CacheManager
 from .models import Switch, SwitchPort
+from .vlan_vid import extract_vlan_vid
+
+if TYPE_CHECKING:
+    from .cache_manager import CacheManager
 
 logger = logging.getLogger(__name__)
 
-import urllib3
-# disable insecure HTTPS warnings (self-signed certs)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# Bump when the layout of the normalized-switch cache entry changes.
+_NORMALIZED_CACHE_VERSION = 3
+
+
+class _HostLoggerAdapter(logging.LoggerAdapter):
+    """Module logger that tags each message with the FortiGate host.
+
+    Replaces a per-host child logger, which registered one logger per device in
+    the global logging manager. The host is also available as record.host.
+    """
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return f"[{self.extra['host']}] {msg}", kwargs
+
 
 class FortiGateClient:
     """Minimal FortiGate client for retrieving managed switch data."""
@@ -25,7 +44,7 @@ class FortiGateClient:
         username: Optional[str] = None,
         password: Optional[str] = None,
         verify_ssl: bool = True,
-        cache_manager: Optional[CacheManager] = None,
+        cache_manager: Optional["CacheManager"] = None,
         vlan_translations: Optional[Dict[str, int]] = None,
     ):
         self.name = name
@@ -35,7 +54,14 @@ class FortiGateClient:
         self.vlan_translations: Dict[str, int] = vlan_translations or {}
         self.base_url = f"https://{host}".rstrip("/")
 
+        if not verify_ssl:
+            # disable insecure HTTPS warnings (self-signed certs)
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
         self.session = requests.Session()
+        # Keep-alive pool for the single FortiGate host; transient gateway errors are retried.
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), raise_on_status=False)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
 
         # Auth: prefer API token if provided.
         if api_token:
@@ -44,7 +70,43 @@ class FortiGateClient:
         elif username and password:
             self.session.auth = (username, password)
 
-        self.logger = logging.getLogger(f"{__name__}.{host}")
+        self.logger = _HostLoggerAdapter(logger, {"host": host})
+
+    def close(self) -> None:
+        """Release the pooled connections to this FortiGate."""
+        self.session.close()
+
+    @property
+    def _normalized_cache_key(self) -> str:
+        return f"fortigate_{self.name}_{self.host}_switches_normalized"
+
+    def _load_normalized_switches(self) -> Optional[List[Switch]]:
+        """Return switches from the normalized cache, or None if missing or stale."""
+        cached = self.cache_manager.get(self._normalized_cache_key) if self.cache_manager else None
+        if not isinstance(cached, dict):
+            return None
+        if (
+            cached.get("version") != _NORMALIZED_CACHE_VERSION
+            or cached.get("vlan_translations") != self.vlan_translations
+        ):
+            return None
+        try:
+            return msgspec.convert(cached["switches"], List[Switch])
+        except (KeyError, msgspec.ValidationError):
+            return None
+
+    def _store_normalized_switches(self, switches: List[Switch]) -> None:
+        """Cache switches as plain lists (array-like structs) so every cache format can store them."""
+        if not self.cache_manager:
+            return
+        self.cache_manager.set(
+            self._normalized_cache_key,
+            {
+                "version": _NORMALIZED_CACHE_VERSION,
+                "vlan_translations": self.vlan_translations,
+                "switches": msgspec.to_builtins(switches),
+            },
+        )
 
     def get_managed_switches_raw(self) -> Dict[str, Any]:
         """Return the raw FortiGate response for managed switches.
@@ -54,41 +116,42 @@ class FortiGateClient:
         """
         cache_key = f"fortigate_{self.name}_{self.host}_managed_switches_raw"
 
-        if self.cache_manager:
-            cached = self.cache_manager.get(cache_key)
+        cache_manager = self.cache_manager
+
+        if cache_manager:
+            cached = cache_manager.get(cache_key)
             if cached is not None:
-                self.logger.info("Using cached FortiSwitch raw data for %s", self.host)
+                self.logger.info("Using cached FortiSwitch raw data")
                 return cached
 
-        self.logger.info("Fetching FortiSwitch raw data from %s API", self.host)
-        resp = self.session.get(
-            f"{self.base_url}/api/v2/cmdb/switch-controller/managed-switch/",
-            verify=self.verify_ssl,
-            timeout=30,
-        )
+        self.logger.info("Fetching FortiSwitch raw data from API")
+        url = f"{self.base_url}/api/v2/cmdb/switch-controller/managed-switch/"
+        # Conditional GET: if the stored response is still current the FortiGate
+        # answers 304 with no body and the stored payload is reused as-is.
+        headers = cache_manager.conditional_headers(cache_key) if cache_manager else {}
+        # verify is passed per request: a session-level verify=False is overridden
+        # by REQUESTS_CA_BUNDLE / CURL_CA_BUNDLE.
+        resp = self.session.get(url, headers=headers, timeout=30, verify=self.verify_ssl)
+        if resp.status_code == 304:
+            cached = cache_manager.load(cache_key) if cache_manager else None
+            if cached is not None:
+                self.logger.info("FortiSwitch data not modified; reusing stored response")
+                cache_manager.touch(cache_key)
+                return cached
+            # Stored payload is gone: fetch the full response.
+            resp = self.session.get(url, timeout=30, verify=self.verify_ssl)
         resp.raise_for_status()
-        data = resp.json()
+        # orjson parses the body bytes directly, without decoding them to a str first.
+        data = orjson.loads(resp.content)
 
-        if self.cache_manager:
-            self.cache_manager.set(cache_key, data)
+        if cache_manager:
+            # The normalized switches were derived from the previous response.
+            cache_manager.delete(self._normalized_cache_key)
+            cache_manager.set(cache_key, data)
+            cache_manager.store_validators(cache_key, resp.headers)
 
         return data
 
-    @staticmethod
-    def _extract_vlan_vid(value: object) -> Optional[int]:
-        """Extract vlan vid as integer from values like 'vlan31', 'VLAN-31', '31'."""
-        if value is None:
-            return None
-        if isinstance(value, int):
-            return value
-        s = str(value).strip()
-        if not s:
-            return None
-        m = re.match(r"^(?:vlan[- ]?)?(\d+)$", s, flags=re.IGNORECASE)
-        if m:
-            return int(m.group(1))
-        return None
-
     def _translate_vlan_to_vid(self, name: Optional[str]) -> Optional[int]:
         """Translate FortiGate VLAN names to NetBox VLAN vid (integer)."""
         if not name:
@@ -98,70 +161,136 @@ class FortiGateClient:
         # Allow mapping in terms of raw FortiGate name (e.g. "_default": 1)
         if raw in self.vlan_translations:
             return self.vlan_translations[raw]
+        # Fallback: parse vlan vid from the string itself (memoized by the parser)
+        return extract_vlan_vid(raw)
 
-        # Fallback: parse vlan vid from the string itself
-        return self._extract_vlan_vid(raw)
+    def _normalize_port_vlans(self, port: Dict[str, Any]) -> Tuple[Optional[int], Tuple[Any, ...]]:
+        """Extract (native_vlan, allowed_vlans) vids from a FortiGate port dict.
 
-    def _normalize_port_vlans(self, port: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract native + tagged VLAN vids from a FortiGate port dict.
+        Returned as a tuple rather than a dict: the caller unpacks it straight
+        into a SwitchPort.
 
         Mapping:
           - native_vlan: from 'vlan' field
-          - allowed_vlans: tagged VLANs from 'allowed-vlans' (excluding native_vlan)
-          - allowed-vlans-all=enable => allowed_vlans=["*"] (tagged-all)
+          - allowed_vlans: tagged VLANs from 'allowed-vlans' (excluding native_vlan),
+            as a sorted tuple of unique vids so the validator can compare it directly
+          - allowed-vlans-all=enable => allowed_vlans=("*",) (tagged-all)
         """
 
-        # Native VLAN from 'vlan' field
-        native_vlan = self._translate_vlan_to_vid(port.get("vlan"))
-
-        # Tagged-all: allowed-vlans-all=enable
-        if str(port.get("allowed-vlans-all", "")).strip().lower() == "enable":
-            return {"native_vlan": native_vlan, "allowed_vlans": ["*"]}
-
-        # Tagged VLANs: allowed-vlans (excluding native)
-        tagged_vlans: List[int] = []
-        for vlan_obj in port.get("allowed-vlans", []) or []:
-            if not isinstance(vlan_obj, dict):
-                continue
-            vlan_name = vlan_obj.get("vlan-name")
-            if not isinstance(vlan_name, str) or not vlan_name:
-                continue
-            norm = self._translate_vlan_to_vid(vlan_name)
-            if isinstance(norm, int) and norm != native_vlan:
-                tagged_vlans.append(norm)
+        # Called once per port: bound methods are hoisted into locals, and exact type
+        # checks are used since the parsed JSON only ever contains plain dicts/strs.
+        get = port.get
+        translate = self._translate_vlan_to_vid
 
-        return {"native_vlan": native_vlan, "allowed_vlans": tagged_vlans}
+        # Native VLAN from 'vlan' field
+        native_vlan = translate(get("vlan"))
+
+        # Tagged-all: allowed-vlans-all=enable (FortiOS sends exactly "enable"/"disable")
+        all_flag = get("allowed-vlans-all")
+        if all_flag == "enable" or (all_flag and str(all_flag).strip().lower() == "enable"):
+            return native_vlan, ("*",)
+
+        # Tagged VLANs: allowed-vlans (excluding native), skipping malformed entries
+        tagged_vlans = {
+            vid
+            for vlan_obj in get("allowed-vlans") or ()
+            if type(vlan_obj) is dict
+            and type(vlan_name := vlan_obj.get("vlan-name")) is str
+            and vlan_name
+            and (vid := translate(vlan_name)) is not None
+            and vid != native_vlan
+        }
+
+        return native_vlan, tuple(sorted(tagged_vlans))
+
+    def _build_port(self, port_name: str, port: Dict[str, Any]) -> SwitchPort:
+        native_vlan, allowed_vlans = self._normalize_port_vlans(port)
+        return SwitchPort(name=port_name, native_vlan=native_vlan, allowed_vlans=allowed_vlans)
+
+    def get_switches(
+        self,
+        raw: Optional[Dict[str, Any]] = None,
+        only_switch_name: Optional[str] = None,
+    ) -> List[Switch]:
+        """Convert FortiGate response into internal Switch objects.
+
+        Args:
+            raw: Already fetched managed-switch response (see fetch_all); fetched if omitted.
+            only_switch_name: If set, only that switch is normalized and returned.
+                Such partial results are not written to the normalized cache.
+        """
+        data = raw if raw is not None else self.get_managed_switches_raw()
+
+        # The normalized cache is removed whenever a fresh response is fetched, so a
+        # hit here always matches the (cached) raw data in hand.
+        switches = self._load_normalized_switches()
+        if switches is not None:
+            self.logger.info("Using cached normalized switches")
+            if only_switch_name:
+                # Switch names are unique per FortiGate: stop at the first match.
+                match = next((sw for sw in switches if sw.name == only_switch_name), None)
+                return [match] if match is not None else []
+            return switches
 
-    def get_switches(self) -> List[Switch]:
-        """Convert FortiGate response into internal Switch objects."""
-        data = self.get_managed_switches_raw()
         results = data.get("results") or []
-        switches: List[Switch] = []
+        switches = []
 
         for sw in results:
             name = sw.get("switch-id") or sw.get("q_origin_key")
             if not name:
-                logger.warning("Skipping switch with no 'switch-id': %s", sw)
+                # Log only the keys: repr() of a whole switch entry can be huge.
+                logger.warning("Skipping switch with no 'switch-id'; keys=%s", list(sw)[:8])
+                continue
+            if only_switch_name and name != only_switch_name:
                 continue
 
-            ports_dict: Dict[str, SwitchPort] = {}
-            ports_raw = sw.get("ports") or []
-            for idx, p in enumerate(ports_raw):
-                if not isinstance(p, dict):
-                    continue
-
-                port_name = p.get("port-name") or p.get("name")
-                if not port_name:
-                    continue
-
-                vlan_info = self._normalize_port_vlans(p)
-                port_model = SwitchPort(
-                    name=port_name,
-                    native_vlan=vlan_info.get("native_vlan"),
-                    allowed_vlans=list(vlan_info.get("allowed_vlans", [])),
-                )
-                ports_dict[port_name] = port_model
-
+            ports_dict: Dict[str, SwitchPort] = {
+                port_name: self._build_port(port_name, p)
+                for p in sw.get("ports") or ()
+                if type(p) is dict and (port_name := p.get("port-name") or p.get("name"))
+            }
             switches.append(Switch(name=name, ports=ports_dict))
+            if only_switch_name:
+                break
 
+        if not only_switch_name:
+            self._store_normalized_switches(switches)
         return switches
+
+
+def fetch_all(clients: List[FortiGateClient]) -> List[Dict[str, Any]]:
+    """Fetch the raw managed-switch data of several FortiGates concurrently.
+
+    The requests are I/O bound, so N devices take about as long as the
+    slowest one instead of the sum of all of them.
+
+    Returns:
+        Raw managed-switch responses, in the order of clients. Names are not
+        required to be unique, so results are not keyed by them.
+
+    Raises:
+        RuntimeError: if fetching from any FortiGate fails. Every fetch is
+            still awaited first and each failure is logged, so one failing
+            device does not hide errors from the others.
+    """
+    if not clients:
+        return []
+
+    results: List[Dict[str, Any]] = []
+    errors: List[RuntimeError] = []
+    with ThreadPoolExecutor(max_workers=min(32, len(clients))) as ex:
+        futs = [ex.submit(c.get_managed_switches_raw) for c in clients]
+        for fut, client in zip(futs, clients):
+            try:
+                results.append(fut.result())
+            except Exception as exc:  # noqa: BLE001
+                error = RuntimeError(
+                    f"Failed to retrieve switches from FortiGate {client.name} ({client.host}): {exc}"
+                )
+                error.__cause__ = exc
+                if errors:
+                    logger.error("%s", error)
+                errors.append(error)
+    if errors:
+        raise errors[0]
+    return results
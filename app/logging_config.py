@@ -1,18 +1,42 @@
+import atexit
 import logging
 import os
+import queue
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
+# Background thread writing log records to the file handler (see configure_logging).
+_queue_listener: Optional[QueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """Flush and stop the file-logging thread, if one is running."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
 
 def configure_logging(level: str = "INFO", log_dir: Optional[Path] = None) -> None:
     """Configure root logger with console and optional file handlers.
 
+    The file handler runs behind a QueueHandler/QueueListener pair, so logging
+    calls only enqueue the record and never wait on disk I/O.
+
     Args:
         level: Log level (INFO, DEBUG, etc.)
         log_dir: If provided, create a timestamped log file in this directory.
     """
+    global _queue_listener
+
     formatter = logging.Formatter(
         fmt="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
         datefmt="%Y-%m-%dT%H:%M:%S",
@@ -21,6 +45,7 @@ def configure_logging(level: str = "INFO", log_dir: Optional[Path] = None) -> No
     root = logging.getLogger()
     root.setLevel(level.upper())
     root.handlers.clear()
+    _stop_queue_listener()
 
     # Console handler (always present)
     console_handler = logging.StreamHandler(sys.stdout)
@@ -30,12 +55,17 @@ def configure_logging(level: str = "INFO", log_dir: Optional[Path] = None) -> No
     # File handler (optional)
     if log_dir:
         try:
-            log_dir.mkdir(parents=True, exist_ok=True)
+            # One stat on the usual warm path; only create the directory when missing.
+            if not os.path.isdir(log_dir):
+                os.makedirs(log_dir, exist_ok=True)
             timestamp = datetime.now().strftime("%Y-%m-%d__%H_%M_%S")
             log_file = log_dir / f"fg-nb-log_{timestamp}.log"
             file_handler = logging.FileHandler(log_file, mode="w", encoding="utf-8")
             file_handler.setFormatter(formatter)
-            root.addHandler(file_handler)
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            _queue_listener = QueueListener(log_queue, file_handler)
+            _queue_listener.start()
+            root.addHandler(QueueHandler(log_queue))
             root.info("Logging to file: %s", log_file)
         except PermissionError as exc:
             root.error(
@@ -1,5 +1,6 @@
 import logging
 import sys
+from datetime import datetime
 from pathlib import Path
 
 from .cache_manager import CacheManager
@@ -17,27 +18,30 @@ def main() -> int:
     # Configure logging with the settings log level and log directory
     configure_logging(settings.log_level, log_dir=settings.log_dir)
 
-    # Initialize cache manager (currently used for cache visibility/logging).
+    # Initialize cache manager (shared with run_sync).
     cache_manager = CacheManager(
         cache_dir=Path(settings.cache_dir),
         use_cache=settings.use_cached_data,
+        cache_format=settings.cache_format,
+        size_limit=settings.cache_size_limit_mb * 1024 * 1024,
     )
 
     if settings.use_cached_data:
         cache_files = cache_manager.list_cache_files()
         logger.info("Cache mode enabled. Found %s cache files:", len(cache_files))
         for cf in cache_files:
-            logger.info("  - %s: %s KB (modified: %s)", cf["key"], cf["size_kb"], cf["modified"])
+            modified = datetime.fromtimestamp(cf["mtime"]).strftime("%Y-%m-%d %H:%M:%S")
+            logger.info("  - %s: %s KB (modified: %s)", cf["key"], cf["size_kb"], modified)
     else:
         logger.info("Cache mode disabled. Fresh API calls will be made and cached (if implemented).")
 
     if settings.test_switch:
         # Filtered run: only operate on a single named switch.
         logger.info("Running in TEST_SWITCH mode for switch: %s", settings.test_switch)
-        return run_sync(settings, only_switch_name=settings.test_switch)
+        return run_sync(settings, only_switch_name=settings.test_switch, cache_manager=cache_manager)
 
     # Full run: process all switches on all FortiGates.
-    return run_sync(settings)
+    return run_sync(settings, cache_manager=cache_manager)
 
 
 if __name__ == "__main__":
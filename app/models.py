@@ -1,24 +1,24 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Tuple, Union
 
+import msgspec
 
-@dataclass
-class SwitchPort:
+
+class SwitchPort(msgspec.Struct, frozen=True, array_like=True):
     """
     Normalized representation of a FortiGate-managed switch port.
 
-    VLANs are stored by name, not VID.
+    VLANs are stored by VID (translated from the FortiGate VLAN names).
     - native_vlan: untagged/native VLAN
-    - allowed_vlans: tagged VLANs only (or ["*"] for tagged-all/allowed-vlans-all)
+    - allowed_vlans: tagged VLANs only, sorted and de-duplicated
+      (or ("*",) for tagged-all/allowed-vlans-all)
     """
 
     name: str
-    native_vlan: Optional[str]
-    allowed_vlans: List[str]
+    native_vlan: Optional[int]
+    allowed_vlans: Tuple[Union[int, str], ...]
 
 
-@dataclass
-class Switch:
+class Switch(msgspec.Struct, frozen=True, array_like=True):
     """Normalized representation of a managed switch."""
 
     name: str
@@ -1,11 +1,38 @@
 import logging
-from typing import Any, Dict, List, Optional
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .cache_manager import CacheManager
-import time
-from requests.exceptions import ReadTimeout, ConnectionError
+from .circuit_breaker import CircuitBreaker
 logger = logging.getLogger(__name__)
 
+# Concurrent page fetches per client; the connection pool must be at least this
+# large (with headroom for callers on other threads) to keep every socket alive.
+_PAGE_WORKERS = 8
+_POOL_MAXSIZE = 32
+
+# Devices per bulk query (?device_id=1&device_id=2... or ?name=a&name=b...),
+# keeping the query string within URL length limits.
+_DEVICE_IDS_PER_QUERY = 50
+
+# Interface fields used for grouping and VLAN validation (NetBox 4.0+ ?fields=;
+# older versions ignore the parameter and return full objects).
+_INTERFACE_FIELDS = "id,name,device,mode,untagged_vlan,tagged_vlans"
+
+
+class _JitteredRetry(Retry):
+    """Retry whose backoff gets a random extra delay, so parallel page workers
+    hitting the same failure do not retry in lockstep."""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, 0.25) if backoff else backoff
+
 
 class NetBoxClient:
     """Thin wrapper around the NetBox REST API (read + limited write operations)."""
@@ -17,6 +44,7 @@ class NetBoxClient:
         timeout: int = 120,
         verify_ssl: bool = True,
         cache_manager: Optional[CacheManager] = None,
+        breaker: Optional[CircuitBreaker] = None,
     ):
         self.base_url = base_url.rstrip('/')
         self.token = token
@@ -24,6 +52,21 @@ class NetBoxClient:
         self.cache_manager = cache_manager
         self.default_timeout = timeout
         self.session = requests.Session()
+        # Keep-alive pool sized above the page worker count so concurrent requests
+        # to the single NetBox host never discard sockets and re-handshake.
+        # Timeouts, connection errors and transient 429/5xx responses are retried
+        # here with jittered exponential backoff, honouring Retry-After.
+        retry = _JitteredRetry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "PATCH"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_POOL_MAXSIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update(
             {
                 'Authorization': f'Token {token}',
@@ -31,68 +74,150 @@ class NetBoxClient:
                 'Accept': 'application/json',
             }
         )
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
+        # Shared by every request so a NetBox outage fails fast instead of each
+        # call (and each pagination worker) burning its full retry budget.
+        self.breaker = breaker or CircuitBreaker("NetBox")
+
+        # Worker pool for concurrent page fetches, created on first use and kept
+        # for the client's lifetime so threads are not re-spawned per listing.
+        self._pool_instance: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        # vid -> VLAN id resolved during this client's lifetime (one run), used
+        # even when the persistent cache is disabled; and vids NetBox reported as
+        # missing (not persisted, so a VLAN created later is found on the next run).
+        self._vlan_ids: Dict[int, int] = {}
+        self._vlan_missing: set[int] = set()
+
+    @property
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._pool_instance is None:
+            with self._pool_lock:
+                if self._pool_instance is None:
+                    self._pool_instance = ThreadPoolExecutor(
+                        max_workers=_PAGE_WORKERS, thread_name_prefix="netbox-page"
+                    )
+        return self._pool_instance
+
+    def close(self) -> None:
+        """Release pooled connections and stop the page worker threads."""
+        if self._pool_instance is not None:
+            self._pool_instance.shutdown(wait=True, cancel_futures=True)
+            self._pool_instance = None
+        self.session.close()
 
-        # Safety: VLAN lookups should be quick and should not block the whole run for minutes.
-        self.vlan_lookup_timeout_seconds = 20
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the circuit breaker.
+
+        Connection errors, timeouts and 5xx responses count as failures; other
+        responses are returned for the caller to handle.
+        """
+
+        def send() -> requests.Response:
+            # verify is passed per request: a session-level verify=False is
+            # overridden by REQUESTS_CA_BUNDLE / CURL_CA_BUNDLE.
+            resp = self.session.request(method, url, verify=self.verify_ssl, **kwargs)
+            if resp.status_code >= 500:
+                resp.raise_for_status()
+            return resp
+
+        return self.breaker.call(send)
 
     def _get(
         self,
         endpoint: str,
         params: dict = None,
-        max_retries: int = 3,
         timeout: Optional[int] = None,
+        cache_key: Optional[str] = None,
     ) -> dict:
-        """Make a GET request to NetBox API with retry logic."""
+        """Make a GET request to NetBox API (retries are handled by the session adapter).
+
+        If cache_key is given, the response is stored under it together with its
+        ETag/Last-Modified, and later calls send a conditional request: on
+        304 Not Modified the stored response is returned without a body transfer.
+        """
         url = f"{self.base_url}{endpoint}"
         params = params or {}
-
-        for attempt in range(max_retries):
-            try:
-                effective_timeout = (timeout or self.default_timeout) + (attempt * 30)
-
-                resp = self.session.get(
-                    url,
-                    params=params,
-                    verify=self.verify_ssl,
-                    timeout=effective_timeout,
-                )
-                resp.raise_for_status()
-                return resp.json()
-
-            except ReadTimeout:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    self.logger.warning(
-                        f"Timeout (attempt {attempt + 1}/{max_retries}), "
-                        f"retrying in {wait_time}s... URL: {endpoint}"
-                    )
-                    time.sleep(wait_time)
-                else:
-                    self.logger.error(f"Failed after {max_retries} attempts for {endpoint}")
-                    raise
-            except ConnectionError:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    self.logger.warning(
-                        f"Connection error (attempt {attempt + 1}/{max_retries}), "
-                        f"retrying in {wait_time}s..."
-                    )
-                    time.sleep(wait_time)
-                else:
-                    raise
+        timeout = timeout or self.default_timeout
+        cache_manager = self.cache_manager if cache_key else None
+        headers = cache_manager.conditional_headers(cache_key) if cache_manager else None
+
+        resp = self._send("GET", url, params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 304:
+            cached = cache_manager.load(cache_key) if cache_manager else None
+            if cached is not None:
+                self.logger.debug("Not modified, reusing stored response: %s", endpoint)
+                cache_manager.touch(cache_key)
+                return cached
+            # Stored response is gone: fetch the full body.
+            resp = self._send("GET", url, params=params, timeout=timeout)
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+        if cache_manager:
+            cache_manager.set(cache_key, data)
+            cache_manager.store_validators(cache_key, resp.headers)
+        return data
 
     def _patch(self, endpoint: str, payload: dict, *, timeout: Optional[int] = None) -> dict:
         """PATCH to NetBox API and return JSON response."""
         url = f"{self.base_url}{endpoint}"
-        resp = self.session.patch(
+        resp = self._send(
+            "PATCH",
             url,
             json=payload,
-            verify=self.verify_ssl,
             timeout=timeout or self.default_timeout,
         )
         resp.raise_for_status()
-        return resp.json()
+        return orjson.loads(resp.content)
+
+    def _iter_paginated(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        limit: int = 100,
+    ) -> Iterator[dict]:
+        """Yield every record of a NetBox list endpoint, page by page.
+
+        The first page reports the total 'count'; the remaining pages are then
+        requested concurrently by offset on the client's worker pool. Records
+        are yielded in page order as soon as each page has arrived.
+
+        Offsets step by the size of the first page, not by limit: NetBox caps
+        limit at its MAX_PAGE_SIZE, and stepping by the requested limit would
+        skip the rows in between.
+        """
+        params = dict(params or {})
+        first = self._get(endpoint, params={**params, "limit": limit, "offset": 0})
+        results = first.get("results", [])
+        yield from results
+        count = first.get("count")
+        page_size = len(results)
+        if not first.get("next") or not isinstance(count, int) or not page_size:
+            return
+
+        offsets = range(page_size, count, page_size)
+        self.logger.debug("Fetching %s more page(s) of %s (count=%s)", len(offsets), endpoint, count)
+        futures = [
+            self._pool.submit(self._get, endpoint, {**params, "limit": page_size, "offset": offset})
+            for offset in offsets
+        ]
+        try:
+            for future in futures:
+                yield from future.result().get("results", [])
+        finally:
+            # Consumer stopped early or a page failed: drop the pages not yet fetched.
+            for future in futures:
+                future.cancel()
+
+    def _get_paginated(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """GET every page of a NetBox list endpoint and return the concatenated results."""
+        return list(self._iter_paginated(endpoint, params, limit))
 
     def get_all_devices(self) -> list[dict]:
         """Get all devices from NetBox with caching support."""
@@ -107,15 +232,7 @@ class NetBoxClient:
 
         # Make API call with pagination
         self.logger.info("Fetching devices from NetBox API")
-        devices = []
-        url = f"{self.base_url}/api/dcim/devices/"
-
-        while url:
-            response = self.session.get(url, verify=self.verify_ssl, timeout=self.default_timeout)
-            response.raise_for_status()
-            data = response.json()
-            devices.extend(data.get("results", []))
-            url = data.get("next")  # Get next page URL
+        devices = self._get_paginated("/api/dcim/devices/")
 
         # Cache the result
         if self.cache_manager:
@@ -123,105 +240,170 @@ class NetBoxClient:
 
         return devices
 
-    def get_device_by_name(self, name: str) -> Optional[Dict[str, Any]]:
-        """
-        Look up a device by its exact name.
+    def get_devices_by_names(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up several devices by exact name, keyed by name.
 
-        Assumes unique device names. Returns the first match or None.
+        Names are sent in filtered listings (?name=a&name=b..., up to 50 names
+        each) instead of one query per name. Names with no device are left out.
         """
-        data = self._get("/api/dcim/devices/", params={"name": name})
-        results = data.get("results", [])
-        if not results:
-            return None
-        if len(results) > 1:
-            logger.warning(
-                "Multiple NetBox devices found with name '%s'; using the first.", name
-            )
-        return results[0]
+        names = list(dict.fromkeys(names))
+        devices: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(names), _DEVICE_IDS_PER_QUERY):
+            for device in self._iter_paginated(
+                "/api/dcim/devices/",
+                params={"name": names[start:start + _DEVICE_IDS_PER_QUERY]},
+            ):
+                name = device.get("name")
+                if name in devices:
+                    self.logger.warning(
+                        "Multiple NetBox devices found with name '%s'; using the first.", name
+                    )
+                    continue
+                devices[name] = device
+        return devices
 
     def get_interface(self, interface_id: int) -> dict:
-        """Get a single interface by ID (fresh read, no cache)."""
+        """Get a single interface by ID.
+
+        Always revalidated against NetBox: the stored copy is only reused when
+        NetBox answers a conditional request with 304 Not Modified.
+        """
         if not isinstance(interface_id, int):
             raise RuntimeError("interface_id must be an integer")
-        return self._get(f"/api/dcim/interfaces/{interface_id}/")
+        return self._get(
+            f"/api/dcim/interfaces/{interface_id}/",
+            cache_key=f"netbox_interface_{interface_id}",
+        )
 
-    def get_interfaces_for_device(self, device_id: int) -> list[dict]:
-        """Get all interfaces for a specific device with caching support."""
-        cache_key = f"netbox_device_{device_id}_interfaces"
+    def get_interfaces_for_devices(self, device_ids: List[int]) -> Dict[int, list[dict]]:
+        """Get the interfaces of several devices, keyed by device id.
 
+        Cached devices are served from the per-device cache entries
+        (netbox_device_<id>_interfaces); all other devices are fetched together
+        with filtered interface listings (?device_id=1&device_id=2..., up to 50
+        devices each) instead of one listing per device, then split by device
+        and cached individually.
+        """
+        result: Dict[int, list[dict]] = {}
+        missing: List[int] = []
+
+        device_ids = list(dict.fromkeys(device_ids))
         # Try cache first (only if use_cache=True)
-        if self.cache_manager:
-            cached_data = self.cache_manager.get(cache_key)
+        cache = (
+            self.cache_manager.mget(f"netbox_device_{device_id}_interfaces" for device_id in device_ids)
+            if self.cache_manager
+            else {}
+        )
+        for device_id in device_ids:
+            cached_data = cache.get(f"netbox_device_{device_id}_interfaces")
             if cached_data is not None:
-                self.logger.info(f"✅ Using cached interfaces for device {device_id}")
-                return cached_data
-
-        # Cache miss or use_cache=False: fetch from API
-        self.logger.info(f"🔄 Fetching interfaces from NetBox API for device {device_id}...")
-        interfaces = []
-        offset = 0
-        limit = 100
-
-        while True:
-            params = {
-                "device_id": device_id,
-                "limit": limit,
-                "offset": offset,
-            }
+                self.logger.info("✅ Using cached interfaces for device %s", device_id)
+                result[device_id] = cached_data
+            else:
+                missing.append(device_id)
 
-            self.logger.debug(f"  Fetching batch: offset={offset}, limit={limit}")
-            data = self._get("/api/dcim/interfaces/", params=params)
+        if not missing:
+            return result
 
-            results = data.get("results", [])
-            interfaces.extend(results)
-
-            if not data.get("next"):
-                break
-
-            offset += limit
-
-        # ALWAYS cache the result (even if use_cache=False)
-        if self.cache_manager:
-            self.cache_manager.set(cache_key, interfaces)
-
-        self.logger.info(f"✅ Fetched {len(interfaces)} interfaces for device {device_id}")
-        return interfaces
-
-    def get_vlan_id_by_vid(self, vid: int) -> int:
-        """Resolve a VLAN vid (e.g. 90) to a NetBox VLAN object ID."""
-        if not isinstance(vid, int):
-            raise RuntimeError(f"VLAN vid must be int, got: {vid!r}")
-        if vid <= 0:
-            raise RuntimeError(f"VLAN vid must be > 0, got: {vid}")
+        # Cache miss or use_cache=False: fetch from API
+        self.logger.info("🔄 Fetching interfaces from NetBox API for device(s) %s...", missing)
+        fetched: Dict[int, list[dict]] = {device_id: [] for device_id in missing}
+        # NetBox's default MAX_PAGE_SIZE is 1000, so a switch's interfaces normally
+        # arrive in a single page. brief=true is not used: the validator needs
+        # mode, untagged_vlan and tagged_vlans, which the brief representation omits.
+        # Instead only those fields (plus id/name/device) are requested.
+        for start in range(0, len(missing), _DEVICE_IDS_PER_QUERY):
+            interfaces = self._iter_paginated(
+                "/api/dcim/interfaces/",
+                params={
+                    "device_id": missing[start:start + _DEVICE_IDS_PER_QUERY],
+                    "fields": _INTERFACE_FIELDS,
+                },
+                limit=1000,
+            )
+            for iface in interfaces:
+                device = iface.get("device")
+                device_id = device.get("id") if isinstance(device, dict) else None
+                if device_id in fetched:
+                    fetched[device_id].append(iface)
+
+        for device_id, device_interfaces in fetched.items():
+            # ALWAYS cache the result (even if use_cache=False)
+            if self.cache_manager:
+                self.cache_manager.set(f"netbox_device_{device_id}_interfaces", device_interfaces)
+            self.logger.info("✅ Fetched %s interfaces for device %s", len(device_interfaces), device_id)
+            result[device_id] = device_interfaces
+
+        return result
+
+    def get_vlan_ids_by_vids(self, vids: Iterable[int]) -> Dict[int, int]:
+        """Resolve several VLAN vids to NetBox VLAN object IDs, keyed by vid.
+
+        vids already resolved in this run, then cached vids (their
+        netbox_vlan_id_vid_<vid> entries) are served locally; the rest are
+        resolved with one filtered VLAN listing (?vid=10&vid=20...) instead of
+        one request per vid.
+        """
+        vids = list(dict.fromkeys(vids))
+        for vid in vids:
+            if not isinstance(vid, int):
+                raise RuntimeError(f"VLAN vid must be int, got: {vid!r}")
+            if vid <= 0:
+                raise RuntimeError(f"VLAN vid must be > 0, got: {vid}")
+
+        known = self._vlan_ids
+        result: Dict[int, int] = {vid: known[vid] for vid in vids if vid in known}
+        if len(result) == len(vids):
+            return result
+
+        cache = (
+            self.cache_manager.mget(f"netbox_vlan_id_vid_{vid}" for vid in vids if vid not in result)
+            if self.cache_manager
+            else {}
+        )
 
-        cache_key = f"netbox_vlan_id_vid_{vid}"
-        if self.cache_manager:
-            cached = self.cache_manager.get(cache_key)
+        unresolved: List[int] = []
+        for vid in vids:
+            if vid in result:
+                continue
+            cached = cache.get(f"netbox_vlan_id_vid_{vid}")
             if isinstance(cached, int):
-                return cached
+                known[vid] = result[vid] = cached
+            elif vid in self._vlan_missing:
+                raise RuntimeError(f"NetBox VLAN not found by vid: {vid}")
+            else:
+                unresolved.append(vid)
+
+        if not unresolved:
+            return result
 
-        self.logger.info("Resolving NetBox VLAN id for vid=%s", vid)
-        data = self._get(
+        self.logger.info("Resolving NetBox VLAN ids for vids=%s", unresolved)
+        vlans = self._get_paginated(
             "/api/ipam/vlans/",
-            params={"vid": vid},
-            timeout=self.vlan_lookup_timeout_seconds,
+            params={"vid": unresolved},
+            limit=1000,
         )
-        results = data.get("results", [])
-        if not results:
-            raise RuntimeError(f"NetBox VLAN not found by vid: {vid}")
-        if len(results) > 1:
-            raise RuntimeError(
-                f"Multiple NetBox VLANs found with vid={vid}; please scope VLANs or make vids unique."
-            )
-
-        vlan_id = results[0].get("id")
-        if not isinstance(vlan_id, int):
-            raise RuntimeError(f"NetBox returned VLAN without integer id for vid={vid}")
+        found: Dict[int, int] = {}
+        for vlan in vlans:
+            vid = vlan.get("vid")
+            vlan_id = vlan.get("id")
+            if vid in found:
+                raise RuntimeError(
+                    f"Multiple NetBox VLANs found with vid={vid}; please scope VLANs or make vids unique."
+                )
+            if not isinstance(vlan_id, int):
+                raise RuntimeError(f"NetBox returned VLAN without integer id for vid={vid}")
+            found[vid] = vlan_id
 
-        if self.cache_manager:
-            self.cache_manager.set(cache_key, vlan_id)
+        for vid in unresolved:
+            if vid not in found:
+                self._vlan_missing.add(vid)
+                raise RuntimeError(f"NetBox VLAN not found by vid: {vid}")
+            if self.cache_manager:
+                self.cache_manager.set(f"netbox_vlan_id_vid_{vid}", found[vid])
+            known[vid] = result[vid] = found[vid]
 
-        return vlan_id
+        return result
 
     def update_interface_vlan_config(
         self,
@@ -239,7 +421,7 @@ class NetBoxClient:
         - tagged VLANs set tagged_vlans (list of VLAN IDs); cleared in access mode
 
         Notes:
-        - This method resolves VLAN object IDs by querying NetBox using vlan vid.
+        - This method resolves VLAN object IDs with a single NetBox query by vlan vid.
         """
         if not isinstance(interface_id, int):
             raise RuntimeError("interface_id must be an integer")
@@ -248,15 +430,13 @@ class NetBoxClient:
         if mode_value not in {"access", "tagged"}:
             raise RuntimeError(f"Unsupported NetBox interface mode for update: {mode!r}")
 
-        untagged_vlan_id = None
+        vids = list(tagged_vlan_vids)
         if native_vlan_vid is not None:
-            self.logger.info("Resolving untagged VLAN: vid=%s", native_vlan_vid)
-            untagged_vlan_id = self.get_vlan_id_by_vid(native_vlan_vid)
+            vids.append(native_vlan_vid)
+        vlan_ids = self.get_vlan_ids_by_vids(vids)
 
-        tagged_vlan_ids: List[int] = []
-        for vv in tagged_vlan_vids:
-            self.logger.info("Resolving tagged VLAN: vid=%s", vv)
-            tagged_vlan_ids.append(self.get_vlan_id_by_vid(vv))
+        untagged_vlan_id = vlan_ids[native_vlan_vid] if native_vlan_vid is not None else None
+        tagged_vlan_ids: List[int] = [vlan_ids[vv] for vv in tagged_vlan_vids]
 
         payload = {
             "mode": mode_value,
@@ -1,92 +1,69 @@
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from .config import Settings
-from .fortigate_client import FortiGateClient
+from .fortigate_client import FortiGateClient, fetch_all
 from .models import Switch
 from .netbox_client import NetBoxClient
 from .vlan_validator import validate_switch_vlans
 from .cache_manager import CacheManager
+from .circuit_breaker import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
 
-def run_sync(settings: Settings, *, only_switch_name: Optional[str] = None) -> int:
+def _process_fortigate(
+    client: FortiGateClient,
+    raw: Dict[str, Any],
+    nb_client: NetBoxClient,
+    cache_manager: Optional[CacheManager],
+    settings: Settings,
+    only_switch_name: Optional[str],
+) -> Tuple[int, bool]:
     """
-    Main synchronization flow:
-    - Retrieve managed switches from each FortiGate.
-    - For each switch, compare VLANs with NetBox.
+    Validate (and in TEST_SWITCH mode, update) the switches of one FortiGate.
 
-    Behavior:
-    - If only_switch_name is provided, only that switch is validated.
-    - If a switch cannot be found in NetBox (by name), stop execution and
-      print concise details about the missing switch.
-    - In normal mode: no changes are made to NetBox; only validation and reporting.
-    - In TEST_SWITCH mode (only_switch_name is set): NetBox VLAN updates may be applied,
-      limited by runtime.max_netbox_updates, then the program stops (kill-switch).
-    - After each PATCH, the device interface cache is invalidated and the updated interface
-      is re-read to verify the change was applied.
-
-    Notes:
-    - This module no longer uses storage.py snapshots; it operates directly
-      against the live FortiGate + NetBox APIs.
+    Returns (exit_code, matched) where matched tells whether any switch was found.
     """
-
-    # Initialize cache manager
-    cache_manager = CacheManager(
-        cache_dir=Path(settings.cache_dir),
-        use_cache=settings.use_cached_data,
-    )
-
-    # Initialize NetBox client with timeout and cache manager
-    nb_client = NetBoxClient(
-        base_url=settings.netbox_url,
-        token=settings.netbox_api_token,
-        timeout=settings.netbox_timeout,
-        cache_manager=cache_manager,
-    )
-
-    matched_any = False
-
-    for fg in settings.fortigate_devices:
-        logger.info("Processing FortiGate %s (%s)", fg.name, fg.host)
-        client = FortiGateClient(
-            name=fg.name,
-            host=fg.host,
-            api_token=fg.api_token,
-            verify_ssl=fg.verify_ssl,
-            cache_manager=cache_manager,
-            vlan_translations=settings.vlan_translations,
-        )
+    matched = False
+    try:
+        logger.info("Processing FortiGate %s (%s)", client.name, client.host)
 
         try:
-            switches: List[Switch] = client.get_switches()
+            switches: List[Switch] = client.get_switches(
+                raw, only_switch_name=only_switch_name
+            )
         except Exception as exc:  # noqa: BLE001
             logger.error(
-                "Failed to retrieve switches from FortiGate %s (%s): %s",
-                fg.name,
-                fg.host,
+                "Failed to process switches from FortiGate %s (%s): %s",
+                client.name,
+                client.host,
                 exc,
             )
-            return 1
-
-        if only_switch_name:
-            switches = [sw for sw in switches if sw.name == only_switch_name]
+            return 1, matched
 
+        # Resolve every switch to its NetBox device first (one filtered device query),
+        # so the interfaces of all of this FortiGate's switches can be fetched in one
+        # bulk request.
+        device_ids: List[int] = []
+        matched = bool(switches)
+        devices_by_name = nb_client.get_devices_by_names(sw.name for sw in switches)
         for sw in switches:
-            matched_any = True
-
-            device = nb_client.get_device_by_name(sw.name)
+            device = devices_by_name.get(sw.name)
             if not device:
                 logger.error("Switch %s not found in NetBox. Stopping execution.", sw.name)
                 print(f"Missing switch in NetBox: name={sw.name}", file=sys.stderr)
-                return 1
+                return 1, matched
+            device_ids.append(device["id"])
 
-            device_id = device["id"]
-            interfaces = nb_client.get_interfaces_for_device(device_id=device_id)
-            mismatches = validate_switch_vlans(sw, interfaces)
+        interfaces_by_device = nb_client.get_interfaces_for_devices(device_ids)
+
+        for sw, device_id in zip(switches, device_ids):
+            interfaces = interfaces_by_device[device_id]
+            mismatches = list(validate_switch_vlans(sw, interfaces))
 
             # Kill-switch: only apply NetBox updates in TEST_SWITCH mode, then stop after N updates.
             if only_switch_name and mismatches:
@@ -98,7 +75,7 @@ def run_sync(settings: Settings, *, only_switch_name: Optional[str] = None) -> i
                         "TEST_SWITCH mode active, but max_netbox_updates=%s; no NetBox updates will be performed.",
                         max_updates,
                     )
-                    return 0
+                    return 0, matched
 
                 applied = 0
                 for m in mismatches:
@@ -112,7 +89,7 @@ def run_sync(settings: Settings, *, only_switch_name: Optional[str] = None) -> i
                         )
                         continue
 
-                    nb_client.update_interface_vlan_config(
+                    updated_iface = nb_client.update_interface_vlan_config(
                         interface_id=iface_id,
                         mode=str(m.get("desired_mode") or "tagged"),
                         native_vlan_vid=m.get("desired_native_vid"),
@@ -123,8 +100,10 @@ def run_sync(settings: Settings, *, only_switch_name: Optional[str] = None) -> i
                     if cache_manager:
                         cache_manager.delete(interfaces_cache_key)
 
-                    # Optional verification: re-read the updated interface and confirm desired state.
-                    updated_iface = nb_client.get_interface(iface_id)
+                    # Verify the desired state from the PATCH response, which NetBox returns
+                    # as the updated interface; re-read it only if those fields are missing.
+                    if not all(k in updated_iface for k in ("mode", "untagged_vlan", "tagged_vlans")):
+                        updated_iface = nb_client.get_interface(iface_id)
                     updated_mode = (updated_iface.get("mode") or {}).get("value")
                     untagged = updated_iface.get("untagged_vlan") or {}
                     updated_native_vid = untagged.get("vid")
@@ -175,11 +154,134 @@ def run_sync(settings: Settings, *, only_switch_name: Optional[str] = None) -> i
                             applied,
                             sw.name,
                         )
-                        return 0
+                        return 0, matched
+    except CircuitOpenError as exc:
+        # NetBox kept failing: stop now instead of paying every remaining
+        # call's timeouts and retries.
+        logger.error("%s", exc)
+        return 1, matched
+
+    return 0, matched
+
+
+def run_sync(
+    settings: Settings,
+    *,
+    only_switch_name: Optional[str] = None,
+    cache_manager: Optional[CacheManager] = None,
+) -> int:
+    """
+    Main synchronization flow:
+    - Retrieve managed switches from all FortiGates (concurrently).
+    - For each switch, compare VLANs with NetBox (one worker per FortiGate;
+      FortiGates are processed in turn in TEST_SWITCH mode).
 
-    if only_switch_name and not matched_any:
-        logger.error("Switch %s not found on any configured FortiGate.", only_switch_name)
-        print(f"Switch not found on any FortiGate: name={only_switch_name}", file=sys.stderr)
-        return 1
+    Behavior:
+    - If only_switch_name is provided, only that switch is validated.
+    - cache_manager may be passed in to share one instance (and its in-memory
+      cache) with the caller; otherwise one is created from settings.
+    - If a switch cannot be found in NetBox (by name), stop execution and
+      print concise details about the missing switch. All switches of a
+      FortiGate are looked up before any of them is validated.
+    - In normal mode: no changes are made to NetBox; only validation and reporting.
+    - In TEST_SWITCH mode (only_switch_name is set): NetBox VLAN updates may be applied,
+      limited by runtime.max_netbox_updates, then the program stops (kill-switch).
+    - After each PATCH, the device interface cache is invalidated and the updated interface
+      returned by NetBox is checked to verify the change was applied.
+
+    Notes:
+    - This module no longer uses storage.py snapshots; it operates directly
+      against the live FortiGate + NetBox APIs.
+    """
+
+    # Initialize cache manager (unless the caller already has one)
+    if cache_manager is None:
+        cache_manager = CacheManager(
+            cache_dir=Path(settings.cache_dir),
+            use_cache=settings.use_cached_data,
+            cache_format=settings.cache_format,
+            size_limit=settings.cache_size_limit_mb * 1024 * 1024,
+        )
+
+    # Initialize NetBox client with timeout and cache manager
+    nb_client = NetBoxClient(
+        base_url=settings.netbox_url,
+        token=settings.netbox_api_token,
+        timeout=settings.netbox_timeout,
+        cache_manager=cache_manager,
+    )
+
+    clients = [
+        FortiGateClient(
+            name=fg.name,
+            host=fg.host,
+            api_token=fg.api_token,
+            verify_ssl=fg.verify_ssl,
+            cache_manager=cache_manager,
+            vlan_translations=settings.vlan_translations,
+        )
+        for fg in settings.fortigate_devices
+    ]
+
+    try:
+        # Fetch all FortiGates concurrently.
+        try:
+            raw_responses = fetch_all(clients)
+        except RuntimeError as exc:
+            logger.error("%s", exc)
+            return 1
+
+        def process(client: FortiGateClient, raw: Dict[str, Any]) -> Tuple[int, bool]:
+            return _process_fortigate(
+                client,
+                raw,
+                nb_client,
+                cache_manager,
+                settings,
+                only_switch_name,
+            )
+
+        matched_any = False
+        exit_code = 0
+        executor: Optional[ThreadPoolExecutor] = None
+        if only_switch_name:
+            # TEST_SWITCH mode may update NetBox: FortiGates are handled one at a time
+            # so max_netbox_updates caps the whole run (a worker that is already
+            # running cannot be cancelled), and none are started after the match.
+            results: Iterator[Tuple[int, bool]] = map(process, clients, raw_responses)
+        else:
+            # FortiGates are independent, so each one's switches are validated on its
+            # own worker; the NetBox client and cache manager are shared and thread-safe.
+            executor = ThreadPoolExecutor(max_workers=min(8, len(clients)) or 1)
+            futures = [
+                executor.submit(process, client, raw) for client, raw in zip(clients, raw_responses)
+            ]
+            results = (future.result() for future in as_completed(futures))
+        try:
+            for code, matched in results:
+                matched_any = matched_any or matched
+                if code:
+                    exit_code = code
+                # Stop execution on failure; in TEST_SWITCH mode the requested switch
+                # has been handled once found.
+                if code or (only_switch_name and matched):
+                    break
+        finally:
+            if executor is not None:
+                # FortiGates not yet started are skipped.
+                executor.shutdown(wait=True, cancel_futures=True)
+        if exit_code:
+            return exit_code
+
+        if only_switch_name and not matched_any:
+            logger.error("Switch %s not found on any configured FortiGate.", only_switch_name)
+            print(f"Switch not found on any FortiGate: name={only_switch_name}", file=sys.stderr)
+            return 1
 
-    return 0
+        return 0
+    finally:
+        # Close keep-alive sockets and worker threads; the cache manager may be
+        # shared with the caller and is left alone.
+        nb_client.close()
+        for client in clients:
+            client.close()
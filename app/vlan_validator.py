@@ -1,50 +1,33 @@
 import logging
 import re
-from typing import Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from .models import Switch
+from .vlan_vid import extract_vlan_vid
 
 logger = logging.getLogger(__name__)
 
+# Trailing port number for natural sorting: 'port10' -> ('port', 10).
+_PORT_SUFFIX_RE = re.compile(r"^(.*?)(\d+)$")
+
 
 def _normalize_port_name(name: str) -> str:
     return name.strip().lower()
 
 
-def _port_sort_key(name: str) -> Tuple[str, int]:
+def _normalized_port_sort_key(s: str) -> Tuple[str, int]:
     """
     Sort ports naturally: port1, port2, ..., port10 (instead of port1, port10, port2).
+
+    s must already have been passed through _normalize_port_name.
     """
-    s = (name or "").strip().lower()
-    m = re.match(r"^(.*?)(\d+)$", s)
+    m = _PORT_SUFFIX_RE.match(s)
     if m:
         return (m.group(1), int(m.group(2)))
     return (s, 0)
 
 
-def _extract_vlan_vid(value: object) -> Optional[int]:
-    """Extract vlan vid as integer from values like 'vlan31', 'VLAN-31', '31'."""
-    if value is None:
-        return None
-    if isinstance(value, int):
-        return value
-
-    s = str(value).strip()
-    if not s:
-        return None
-
-    m = re.match(r"^(?:vlan[- ]?)?(\d+)$", s, flags=re.IGNORECASE)
-    if m:
-        return int(m.group(1))
-
-    # NetBox sometimes provides 'display' like 'VLAN-31 (31)'
-    m = re.match(r"^(?:vlan[- ]?)?(\d+)\s*\(\d+\)$", s, flags=re.IGNORECASE)
-    if m:
-        return int(m.group(1))
-
-    return None
-
-
 def _extract_netbox_mode(iface: dict) -> Optional[str]:
     """Extract NetBox interface mode value."""
     mode = iface.get("mode")
@@ -55,93 +38,117 @@ def _extract_netbox_mode(iface: dict) -> Optional[str]:
     return None
 
 
-def _extract_netbox_vlan_info(interfaces: List[dict]) -> Dict[str, Dict[str, object]]:
+def _vlan_ref_vid(vlan: dict) -> Optional[int]:
+    """vid of a nested NetBox VLAN object, falling back to parsing its name/display."""
+    vid = vlan.get("vid")
+    if isinstance(vid, int):
+        return vid
+    return extract_vlan_vid(vlan.get("name") or vlan.get("display"))
+
+
+class _NBPort(NamedTuple):
+    """VLAN view of one NetBox interface, as built by _extract_netbox_vlan_info."""
+
+    id: Optional[int]
+    name: str
+    native_vlan_vid: Optional[int]
+    tagged_vlan_vids: Tuple[object, ...]
+    mode: str
+
+
+def _extract_netbox_vlan_info(interfaces: List[dict]) -> Dict[str, _NBPort]:
     """Convert NetBox interface JSON into a normalized mapping.
 
     Returns:
         {
-          "port_name_lower": {
-            "id": 123,
-            "name": "Port1",
-            "native_vlan_vid": 31 or None,
-            "tagged_vlan_vids": [50, ...] or ["*"] for tagged-all,
-            "mode": "access" | "tagged" | "tagged-all" | "unknown"
-          },
+          "port_name_lower": _NBPort(
+            id=123,
+            name="Port1",
+            native_vlan_vid=31 or None,
+            tagged_vlan_vids=(50, ...) or ("*",) for tagged-all,
+            mode="access" | "tagged" | "tagged-all" | "unknown",
+          ),
           ...
         }
 
     Notes:
       - Port names are matched case-insensitively.
       - VLANs are represented by vid integers (not names) to avoid dependency on naming.
-      - mode=access: tagged_vlan_vids=[]
-      - mode=tagged: tagged_vlan_vids=explicit list from tagged_vlans field
-      - mode=tagged-all: tagged_vlan_vids=["*"]
+      - mode=access: tagged_vlan_vids=()
+      - mode=tagged: tagged_vlan_vids=sorted tuple from tagged_vlans field
+      - mode=tagged-all: tagged_vlan_vids=("*",)
+      - tagged_vlan_vids has the same shape as SwitchPort.allowed_vlans, so the
+        two compare directly.
     """
-    mapping: Dict[str, Dict[str, object]] = {}
+    mapping: Dict[str, _NBPort] = {}
+
+    # Called once per interface of every device: module-level helpers and bound
+    # methods are hoisted into locals.
+    normalize = _normalize_port_name
+    extract_mode = _extract_netbox_mode
+    ref_vid = _vlan_ref_vid
+    existing_for = mapping.get
 
     for iface in interfaces:
-        iface_id = iface.get("id")
-        raw_name = iface.get("name")
+        get = iface.get
+        raw_name = get("name")
         if not raw_name:
             continue
 
-        key = _normalize_port_name(raw_name)
-        if key in mapping and mapping[key].get("name") != raw_name:
+        key = normalize(raw_name)
+        existing = existing_for(key)
+        if existing is not None and existing.name != raw_name:
             logger.warning(
                 "NetBox contains interfaces that differ only by case: %s and %s; using %s",
-                mapping[key].get("name"),
+                existing.name,
                 raw_name,
-                mapping[key].get("name"),
+                existing.name,
             )
             continue
 
-        untagged = iface.get("untagged_vlan")
-        tagged = iface.get("tagged_vlans") or []
-        mode = _extract_netbox_mode(iface)
-
-        native_vid: Optional[int] = None
-        if isinstance(untagged, dict):
-            native_vid = untagged.get("vid")
-            if not isinstance(native_vid, int):
-                native_vid = _extract_vlan_vid(untagged.get("name") or untagged.get("display"))
-
-        tagged_set: set[int] = set()
-        for v in tagged:
-            if not isinstance(v, dict):
-                continue
-            vv = v.get("vid")
-            if not isinstance(vv, int):
-                vv = _extract_vlan_vid(v.get("name") or v.get("display"))
-            if isinstance(vv, int):
-                tagged_set.add(vv)
+        untagged = get("untagged_vlan")
+        tagged = get("tagged_vlans") or []
+        mode = extract_mode(iface)
+
+        native_vid = ref_vid(untagged) if isinstance(untagged, dict) else None
 
         # NetBox semantics by mode:
         # - access: only untagged_vlan, tagged_vlans ignored/empty
         # - tagged: untagged_vlan (native) + tagged_vlans (explicit tagged VLANs)
         # - tagged-all: untagged_vlan (native), tagged_vlans empty => treat as "*" (all tagged)
         if mode == "tagged-all":
-            tagged_list: List[object] = ["*"]
+            tagged_vids: Tuple[object, ...] = ("*",)
         elif mode == "access":
-            tagged_list = []
+            tagged_vids = ()
         else:
-            tagged_list = sorted(tagged_set)
-
-        mapping[key] = {
-            "id": iface_id,
-            "name": raw_name,
-            "native_vlan_vid": native_vid,
-            "tagged_vlan_vids": tagged_list,
-            "mode": mode or "unknown",
-        }
+            # Ports carry tens of VLANs at most: de-duplicate with dict.fromkeys and sort once.
+            tagged_vids = tuple(
+                sorted(
+                    dict.fromkeys(
+                        vid
+                        for v in tagged
+                        if isinstance(v, dict) and (vid := ref_vid(v)) is not None
+                    )
+                )
+            )
+
+        mapping[key] = _NBPort(get("id"), raw_name, native_vid, tagged_vids, mode or "unknown")
 
     return mapping
 
 
-def validate_switch_vlans(switch: Switch, netbox_interfaces: List[dict]) -> List[dict]:
+def validate_switch_vlans(
+    switch: Switch,
+    netbox_interfaces: List[dict],
+) -> Iterator[dict]:
     """Compare FortiGate switch VLAN configuration with NetBox for a single switch.
 
-    Returns:
-        List of mismatch dictionaries, each containing:
+    Mismatches are yielded as they are found, so callers can act on each one
+    without waiting for the whole switch; wrap in list() when a list is needed.
+    The per-switch summary is logged once the generator is exhausted.
+
+    Yields:
+        Mismatch dictionaries, each containing:
         - switch: switch name
         - port: port name
         - netbox_interface_id: NetBox interface ID
@@ -152,98 +159,130 @@ def validate_switch_vlans(switch: Switch, netbox_interfaces: List[dict]) -> List
     """
 
     nb_map = _extract_netbox_vlan_info(netbox_interfaces)
-    mismatches: List[dict] = []
-
-    for port_name in sorted(switch.ports.keys(), key=_port_sort_key):
-        fg_port = switch.ports[port_name]
-        nb_port = nb_map.get(_normalize_port_name(port_name))
+    mismatched_ports: List[str] = []
+    missing_ports: List[str] = []
+
+    # Per-port loop: lookups that do not change between ports are bound once, and
+    # each NetBox record is unpacked into locals a single time.
+    switch_name = switch.name
+    nb_get = nb_map.get
+    # Matching ports are the common case: skip building their records when INFO is off.
+    info_enabled = logger.isEnabledFor(logging.INFO)
+    # Decorate once: each port name is normalized a single time, for both the sort
+    # key and the NetBox lookup, and the sort compares the precomputed keys.
+    ports = [
+        (_normalized_port_sort_key(norm_name := _normalize_port_name(name)), norm_name, name, port)
+        for name, port in switch.ports.items()
+    ]
+    ports.sort(key=itemgetter(0))
+
+    for _, norm_name, port_name, fg_port in ports:
+        nb_port = nb_get(norm_name)
         if not nb_port:
             logger.warning(
                 "Port %s on switch %s not found in NetBox (case-insensitive match).",
                 port_name,
-                switch.name,
+                switch_name,
             )
+            missing_ports.append(port_name)
             continue
 
-        nb_native = nb_port["native_vlan_vid"]
-        nb_tagged = nb_port["tagged_vlan_vids"]
-        nb_mode = nb_port.get("mode")
-        nb_iface_id = nb_port.get("id")
+        nb_iface_id, nb_name, nb_native, nb_tagged, nb_mode = nb_port
 
-        fg_tagged_raw = list(fg_port.allowed_vlans)  # now treated as tagged VLANs
-        fg_native = _extract_vlan_vid(fg_port.native_vlan)
-        fg_tagged = sorted({v for v in (_extract_vlan_vid(v) for v in fg_tagged_raw) if isinstance(v, int)})
+        fg_native = fg_port.native_vlan
+        # Tagged VLANs arrive as a sorted tuple of unique vids (or ("*",)) from the model.
+        fg_tagged_raw = fg_port.allowed_vlans
 
-        # Tagged-all handling: if either side says "*" treat it as tagged-all and only compare native VLAN
-        fg_is_all = "*" in fg_tagged_raw
-        nb_is_all = isinstance(nb_tagged, list) and "*" in nb_tagged
+        # Tagged-all handling: if either side says "*" treat it as tagged-all and only compare native VLAN.
+        # Both sides only ever use "*" as the sole entry, so no scan of the vids is needed.
+        fg_is_all = fg_tagged_raw == ("*",)
+        nb_is_all = nb_tagged == ("*",)
         if fg_is_all or nb_is_all:
             if fg_native != nb_native:
                 logger.error(
                     "VLAN mismatch for %s/%s (NetBox iface=%s, mode=%s): FG native_vid=%s tagged=ALL, NB native_vid=%s tagged=ALL",
-                    switch.name,
+                    switch_name,
                     port_name,
-                    nb_port.get("name"),
+                    nb_name,
                     nb_mode,
                     fg_native,
                     nb_native,
                 )
-                mismatches.append(
-                    {
-                        "switch": switch.name,
-                        "port": port_name,
-                        "netbox_interface_id": nb_iface_id,
-                        "netbox_interface_name": nb_port.get("name"),
-                        "desired_mode": "tagged",  # conservative default for now
-                        "desired_native_vid": fg_native,
-                        "desired_tagged_vids": [],  # tagged-all not handled yet
-                    }
-                )
-            else:
+                mismatched_ports.append(port_name)
+                yield {
+                    "switch": switch_name,
+                    "port": port_name,
+                    "netbox_interface_id": nb_iface_id,
+                    "netbox_interface_name": nb_name,
+                    "desired_mode": "tagged",  # conservative default for now
+                    "desired_native_vid": fg_native,
+                    "desired_tagged_vids": [],  # tagged-all not handled yet
+                }
+            elif info_enabled:
                 logger.info(
                     "VLANs match for %s/%s (NetBox iface=%s, mode=%s, native_vid=%s, tagged=ALL)",
-                    switch.name,
+                    switch_name,
                     port_name,
-                    nb_port.get("name"),
+                    nb_name,
                     nb_mode,
                     fg_native,
                 )
             continue
 
-        if fg_native != nb_native or fg_tagged != nb_tagged:
+        # Same shape on both sides (sorted tuples of vids): compared without copying.
+        if fg_native != nb_native or fg_tagged_raw != nb_tagged:
+            fg_tagged = list(fg_tagged_raw)
             logger.error(
                 "VLAN mismatch for %s/%s (NetBox iface=%s, mode=%s): FG native_vid=%s tagged_vids=%s, "
                 "NB native_vid=%s tagged_vids=%s",
-                switch.name,
+                switch_name,
                 port_name,
-                nb_port.get("name"),
+                nb_name,
                 nb_mode,
                 fg_native,
                 fg_tagged,
                 nb_native,
-                nb_tagged,
+                list(nb_tagged),
             )
             desired_mode = "tagged" if fg_tagged else "access"
-            mismatches.append(
-                {
-                    "switch": switch.name,
-                    "port": port_name,
-                    "netbox_interface_id": nb_iface_id,
-                    "netbox_interface_name": nb_port.get("name"),
-                    "desired_mode": desired_mode,
-                    "desired_native_vid": fg_native,
-                    "desired_tagged_vids": fg_tagged,
-                }
-            )
-        else:
+            mismatched_ports.append(port_name)
+            yield {
+                "switch": switch_name,
+                "port": port_name,
+                "netbox_interface_id": nb_iface_id,
+                "netbox_interface_name": nb_name,
+                "desired_mode": desired_mode,
+                "desired_native_vid": fg_native,
+                "desired_tagged_vids": fg_tagged,
+            }
+        elif info_enabled:
             logger.info(
                 "VLANs match for %s/%s (NetBox iface=%s, mode=%s, native_vid=%s, tagged_vids=%s)",
-                switch.name,
+                switch_name,
                 port_name,
-                nb_port.get("name"),
+                nb_name,
                 nb_mode,
                 fg_native,
-                fg_tagged,
+                list(fg_tagged_raw),
             )
 
-    return mismatches
+    # Ports missing from NetBox were never compared, so they are reported on
+    # their own and left out of the compared count.
+    compared = len(ports) - len(missing_ports)
+    if missing_ports:
+        logger.warning(
+            "Switch %s: %s port(s) not found in NetBox: %s",
+            switch_name,
+            len(missing_ports),
+            ", ".join(missing_ports),
+        )
+    if mismatched_ports:
+        logger.error(
+            "Switch %s: %s of %s compared port(s) mismatch NetBox: %s",
+            switch_name,
+            len(mismatched_ports),
+            compared,
+            ", ".join(mismatched_ports),
+        )
+    elif compared and info_enabled:
+        logger.info("Switch %s: all %s compared port(s) match NetBox", switch_name, compared)
@@ -0,0 +1,50 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+# VLAN name -> vid parsing shared by config, fortigate_client and vlan_validator.
+# Kept free of model/client imports so the config loader stays lightweight.
+
+# 'vlan31', 'VLAN-31', '31', and NetBox 'display' values like 'VLAN-31 (31)'.
+_VLAN_VID_RE = re.compile(r"^(?:vlan[- ]?)?(\d+)(?:\s*\(\d+\))?$", re.IGNORECASE)
+
+
+def extract_vlan_vid(value: object) -> Optional[int]:
+    """Extract vlan vid as integer from values like 'vlan31', 'VLAN-31', '31'.
+
+    The one VLAN name parser: FortiGate names, NetBox VLAN names and config
+    vlan_translations all go through it and share its memo.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    s = value if type(value) is str else str(value)
+    # Strip only when needed so clean names skip the copy and whitespace
+    # variants share one cache entry.
+    if s and (s[0].isspace() or s[-1].isspace()):
+        s = s.strip()
+    return _parse_vlan_vid(s)
+
+
+@lru_cache(maxsize=4096)
+def _parse_vlan_vid(s: str) -> Optional[int]:
+    # Few distinct VLAN names exist per deployment, so results are memoized.
+    # Callers pass already-stripped strings.
+    if not s:
+        return None
+
+    # Fast path for the common 'vlan31' / 'VLAN-31' / '31' shapes.
+    if s.isdecimal():
+        return int(s)
+    low = s.lower()
+    if low.startswith("vlan"):
+        rest = low[5:] if low[4:5] in ("-", " ") else low[4:]
+        if rest.isdecimal():
+            return int(rest)
+
+    m = _VLAN_VID_RE.match(s)
+    if m:
+        return int(m.group(1))
+
+    return None